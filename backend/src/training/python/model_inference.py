@@ -1,100 +1,421 @@
 import torch
-import torch.nn as nn
 import numpy as np
 import json
-import joblib
-from typing import List, Dict, Any, Tuple
+from dataclasses import dataclass
+from typing import List, Dict, Any, Tuple, NamedTuple, Iterable, Union, FrozenSet
 import os
 
+# Rows per traced forward pass; requests are padded or chunked to this size
+MAX_LENDERS = 32
+
+# Feature normalization constants, stored as reciprocals so feature extraction multiplies
+_INV_LOAN_AMOUNT = 1.0 / 1000000
+_INV_ANNUAL_INCOME = 1.0 / 500000
+_INV_CREDIT_SCORE = 1.0 / 850
+_INV_INTEREST_RATE = 1.0 / 20
+_INV_CREDIT_BUFFER = 1.0 / 550
+
+# Bit position per employment status in the app's enum. Fixed: statuses outside it have
+# no bit and are matched by name instead (see _employment_matches).
+EMPLOYMENT_CODES = {
+    status: code for code, status in enumerate(
+        ['salaried', 'self-employed', 'freelancer', 'student', 'unemployed']
+    )
+}
+_ANY_EMPLOYMENT_MASK = -1  # all bits set
+
+def _employment_bit(status: str) -> int:
+    """Single-bit mask for an employment status, 0 for statuses outside the enum"""
+    code = EMPLOYMENT_CODES.get(status)
+    return 0 if code is None else 1 << code
+
+def _employment_mask(employment_types: Iterable[str]) -> int:
+    """Bitmask of the enum employment statuses a lender accepts ('any' sets every bit)"""
+    if 'any' in employment_types:
+        return _ANY_EMPLOYMENT_MASK
+    
+    mask = 0
+    for employment_type in employment_types:
+        mask |= _employment_bit(employment_type)
+    return mask
+
+def _extra_employment_types(employment_types: Iterable[str]) -> FrozenSet[str]:
+    """Accepted employment types that have no bit in EMPLOYMENT_CODES"""
+    return frozenset(t for t in employment_types if t != 'any' and t not in EMPLOYMENT_CODES)
+
+def _employment_matches(empl_mask: int, extra_types: FrozenSet[str], status: str) -> bool:
+    """Whether a lender with this mask and extra types accepts an employment status"""
+    bit = _employment_bit(status)
+    if bit:
+        return (empl_mask & bit) != 0
+    return empl_mask == _ANY_EMPLOYMENT_MASK or status in extra_types
+
+class LenderRecord(NamedTuple):
+    """A lender with its schema normalized once, so hot paths use attribute access only"""
+    id: Any
+    name: str
+    min_loan: float
+    max_loan: float
+    min_income: float
+    min_credit_score: float
+    interest_rate: float
+    empl_mask: int
+    extra_employment_types: FrozenSet[str]
+    purpose: Any
+    is_any_purpose: bool
+    special_flag: float
+
+# On-disk layout of a LenderTable, one fixed-width record per lender. Only the fixed
+# EMPLOYMENT_CODES bits are persisted; save() rejects lenders with types outside the enum.
+LENDER_DTYPE = np.dtype([
+    ('id', 'i8'),
+    ('name', 'U64'),
+    ('min_loan', 'f8'),
+    ('max_loan', 'f8'),
+    ('min_income', 'f8'),
+    ('min_credit_score', 'f8'),
+    ('interest_rate', 'f8'),
+    ('purpose', 'U32'),
+    ('any_purpose', '?'),
+    ('empl_mask', 'i8'),
+    ('special_flag', 'f8'),
+])
+
+@dataclass
+class LenderTable:
+    """Column-wise (SoA) lender data for vectorized eligibility checks and feature building"""
+    ids: Tuple[Any, ...]
+    names: Tuple[str, ...]
+    min_loan: np.ndarray
+    max_loan: np.ndarray
+    min_income: np.ndarray
+    min_credit_score: np.ndarray
+    interest_rate: np.ndarray
+    purpose: np.ndarray
+    any_purpose: np.ndarray
+    empl_mask: np.ndarray
+    special_flag: np.ndarray
+    extra_employment_types: Tuple[FrozenSet[str], ...]
+    
+    @classmethod
+    def from_records(cls, records: List[LenderRecord]) -> 'LenderTable':
+        """Build the table from normalized lender records"""
+        return cls(
+            ids=tuple(r.id for r in records),
+            names=tuple(r.name for r in records),
+            min_loan=np.array([r.min_loan for r in records], dtype=np.float64),
+            max_loan=np.array([r.max_loan for r in records], dtype=np.float64),
+            min_income=np.array([r.min_income for r in records], dtype=np.float64),
+            min_credit_score=np.array([r.min_credit_score for r in records], dtype=np.float64),
+            interest_rate=np.array([r.interest_rate for r in records], dtype=np.float64),
+            purpose=np.array([r.purpose for r in records], dtype=object),
+            any_purpose=np.array([r.is_any_purpose for r in records], dtype=bool),
+            empl_mask=np.array([r.empl_mask for r in records], dtype=np.int64),
+            special_flag=np.array([r.special_flag for r in records], dtype=np.float64),
+            extra_employment_types=tuple(r.extra_employment_types for r in records),
+        )
+    
+    def save(self, path: str):
+        """Write the table as a structured .npy file that load() can memory-map"""
+        unpersistable = [
+            lender_id for lender_id, extra_types in zip(self.ids, self.extra_employment_types) if extra_types
+        ]
+        if unpersistable:
+            raise ValueError(
+                f"Lenders {unpersistable} accept employment types outside EMPLOYMENT_CODES, "
+                "which the binary lender table cannot store"
+            )
+        
+        # A lender without a purpose is stored as '', which no user purpose matches
+        purposes = ['' if purpose is None else purpose for purpose in self.purpose]
+        
+        # Fixed-width string fields would silently truncate longer values
+        for field, values in (('name', self.names), ('purpose', purposes)):
+            width = LENDER_DTYPE[field].itemsize // np.dtype('U1').itemsize
+            too_long = [value for value in values if len(value) > width]
+            if too_long:
+                raise ValueError(f"Lender {field} longer than {width} characters: {too_long[0]!r}")
+        
+        records = np.empty(len(self), dtype=LENDER_DTYPE)
+        records['id'] = self.ids
+        records['name'] = self.names
+        records['min_loan'] = self.min_loan
+        records['max_loan'] = self.max_loan
+        records['min_income'] = self.min_income
+        records['min_credit_score'] = self.min_credit_score
+        records['interest_rate'] = self.interest_rate
+        records['purpose'] = purposes
+        records['any_purpose'] = self.any_purpose
+        records['empl_mask'] = self.empl_mask
+        records['special_flag'] = self.special_flag
+        np.save(path, records)
+    
+    @classmethod
+    def load(cls, path: str) -> 'LenderTable':
+        """Memory-map a table written by save(); the columns are read-only views of the file"""
+        records = np.load(path, mmap_mode='r')
+        if records.dtype != LENDER_DTYPE:
+            raise ValueError(f"Unexpected lender table layout in {path}: {records.dtype}")
+        
+        # Masks are 'any' (all bits) or built from the enum's bits only
+        known_bits = (1 << len(EMPLOYMENT_CODES)) - 1
+        empl_mask = records['empl_mask']
+        if np.any((empl_mask != _ANY_EMPLOYMENT_MASK) & ((empl_mask & ~known_bits) != 0)):
+            raise ValueError(f"Lender table {path} has employment bits outside EMPLOYMENT_CODES")
+        
+        return cls(
+            ids=tuple(records['id'].tolist()),
+            names=tuple(records['name'].tolist()),
+            min_loan=records['min_loan'],
+            max_loan=records['max_loan'],
+            min_income=records['min_income'],
+            min_credit_score=records['min_credit_score'],
+            interest_rate=records['interest_rate'],
+            purpose=records['purpose'],
+            any_purpose=records['any_purpose'],
+            empl_mask=empl_mask,
+            special_flag=records['special_flag'],
+            extra_employment_types=(frozenset(),) * len(records),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def employment_matches(self, status: str) -> np.ndarray:
+        """_employment_matches for every lender, as a boolean array"""
+        bit = _employment_bit(status)
+        if bit:
+            return (self.empl_mask & bit) != 0
+        
+        extra_match = np.fromiter(
+            (status in extra_types for extra_types in self.extra_employment_types),
+            dtype=bool, count=len(self)
+        )
+        return (self.empl_mask == _ANY_EMPLOYMENT_MASK) | extra_match
+
 class LoanMatchingInference:
     """Inference engine for trained loan matching model"""
     
     def __init__(self, model_path: str = "../models"):
         self.model_path = model_path
         self.model = None
-        self.scaler = None
+        self._numpy_layers = None
+        self._numpy_mean = None
+        self._numpy_scale = None
+        self._host_buffer = None
+        self._device_buffer = None
         self.metadata = None
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
         self._load_model_artifacts()
     
     def _load_model_artifacts(self):
-        """Load trained model, scaler, and metadata"""
+        """Load trained model and metadata"""
         try:
             # Load metadata
             with open(f"{self.model_path}/model_metadata.json", 'r') as f:
                 self.metadata = json.load(f)
             
-            # Load scaler
-            self.scaler = joblib.load(f"{self.model_path}/feature_scaler.pkl")
-            
             # Initialize and load model
-            from train_model import LoanMatchingModel
+            from train_model import LoanMatchingModel, configure_cpu_threads
+            if self.device.type == 'cpu':
+                configure_cpu_threads()
             self.model = LoanMatchingModel(
                 input_size=self.metadata['input_size'],
                 hidden_size=self.metadata['model_config']['hidden_size'],
                 dropout=0.0  # No dropout during inference
             )
             
-            self.model.load_state_dict(torch.load(
+            state_dict = torch.load(
                 f"{self.model_path}/loan_matching_model.pth",
                 map_location=self.device
-            ))
+            )
+            if 'feat_mean' not in state_dict:
+                # Checkpoint predates in-model normalization; use the scaler stats from metadata
+                state_dict['feat_mean'] = torch.tensor(self.metadata['scaler_mean'], dtype=torch.float32)
+                state_dict['feat_std'] = torch.tensor(self.metadata['scaler_std'], dtype=torch.float32)
+            self.model.load_state_dict(state_dict)
             self.model.to(self.device)
             self.model.eval()
             
+            # On CPU the MLP is small enough that torch's per-op overhead outweighs the
+            # math, so keep (W, b) per layer for a plain NumPy forward pass
+            if self.device.type == 'cpu':
+                self._numpy_mean = self.model.feat_mean.numpy().copy()
+                self._numpy_scale = self.model.feat_std.numpy().copy()
+                self._numpy_layers = [
+                    (weight.detach().numpy().copy(), bias.detach().numpy().copy())
+                    for weight, bias in self.model.layers()
+                ]
+            
+            if self._numpy_layers is None:
+                # Trace at the fixed MAX_LENDERS batch shape every request is padded to, so the
+                # frozen graph is specialized to one shape with no per-call shape dispatch.
+                # The warmups below exercise the graph, so the trace check is skipped.
+                example = torch.zeros(MAX_LENDERS, self.metadata['input_size'], device=self.device)
+                traced_model = torch.jit.trace(self.model, example, check_trace=False)
+                self.model = torch.jit.optimize_for_inference(torch.jit.freeze(traced_model))
+                
+                # Reusable staging buffers of the traced shape (pinned for host->device copies)
+                self._allocate_transfer_buffers()
+                
+                # Warm up so the first real requests don't pay for the profiling runs
+                with torch.inference_mode():
+                    for _ in range(2):
+                        self.model(example)
+            
             print("Model artifacts loaded successfully!")
             
         except Exception as e:
             print(f"Error loading model artifacts: {e}")
             raise
     
+    def _normalize_lender(self, lender_data: Dict[str, Any]) -> LenderRecord:
+        """Resolve optional lender fields and their defaults once per call, before the hot path"""
+        employment_types = lender_data.get('employmentTypes') or []
+        purpose = lender_data.get('loanPurpose')
+        
+        return LenderRecord(
+            id=lender_data['id'],
+            name=lender_data['name'],
+            min_loan=lender_data['minLoanAmount'],
+            max_loan=lender_data['maxLoanAmount'],
+            min_income=lender_data['minIncome'],
+            min_credit_score=lender_data['minCreditScore'],
+            interest_rate=lender_data['interestRate'],
+            empl_mask=_employment_mask(employment_types),
+            extra_employment_types=_extra_employment_types(employment_types),
+            purpose=purpose,
+            is_any_purpose=purpose == 'any',
+            special_flag=1.0 if lender_data.get('specialEligibility') else 0.0,
+        )
+    
+    def build_lender_table(self, lenders: List[Dict[str, Any]]) -> LenderTable:
+        """Convert lender dicts into a LenderTable once, for reuse across predict_with_eligibility calls"""
+        return LenderTable.from_records([self._normalize_lender(lender) for lender in lenders])
+    
+    def _check_eligibility_vectorized(self, user_profile: Dict[str, Any],
+                                      table: LenderTable) -> Dict[str, np.ndarray]:
+        """check_eligibility for every lender in the table, one boolean array per criterion"""
+        loan_amount = user_profile['loanAmount']
+        
+        return {
+            'loanAmountInRange': (table.min_loan <= loan_amount) & (loan_amount <= table.max_loan),
+            'incomeRequirement': user_profile['annualIncome'] >= table.min_income,
+            'creditScoreRequirement': user_profile['creditScore'] >= table.min_credit_score,
+            'employmentTypeMatch': table.employment_matches(user_profile['employmentStatus']),
+            'purposeMatch': table.any_purpose | (table.purpose == user_profile['loanPurpose'])
+        }
+    
+    def _build_feature_matrix(self, user_profile: Dict[str, Any], table: LenderTable,
+                              idx: np.ndarray, eligibility: Dict[str, np.ndarray]) -> np.ndarray:
+        """extract_features for the lenders at idx, as an (len(idx), input_size) float32 matrix"""
+        loan_amount = user_profile['loanAmount']
+        annual_income = user_profile['annualIncome']
+        credit_score = user_profile['creditScore']
+        min_income = table.min_income[idx]
+        
+        features = np.empty((len(idx), 10), dtype=np.float32)
+        features[:, 0] = min(loan_amount * _INV_LOAN_AMOUNT, 1.0)  # loanAmountNorm
+        features[:, 1] = min(annual_income * _INV_ANNUAL_INCOME, 1.0)  # annualIncomeNorm
+        features[:, 2] = credit_score * _INV_CREDIT_SCORE  # creditScoreNorm
+        features[:, 3] = table.interest_rate[idx] * _INV_INTEREST_RATE  # interestRateNorm
+        features[:, 4] = eligibility['employmentTypeMatch'][idx]  # employmentMatch
+        features[:, 5] = eligibility['purposeMatch'][idx]  # purposeMatch
+        features[:, 6] = table.special_flag[idx]  # specialEligibility
+        features[:, 7] = loan_amount / table.max_loan[idx]  # loanToMaxRatio
+        features[:, 8] = np.where(
+            min_income > 0, annual_income / np.where(min_income > 0, min_income, 1.0), 1.0
+        )  # incomeMultiple
+        features[:, 9] = np.maximum(0, (credit_score - table.min_credit_score[idx]) * _INV_CREDIT_BUFFER)  # creditBuffer
+        
+        return features
+    
     def extract_features(self, user_profile: Dict[str, Any], lender_data: Dict[str, Any]) -> List[float]:
         """Extract features for a user-lender pair"""
+        lender = self._normalize_lender(lender_data)
+        
         return [
             # Normalized numerical features (0-1)
-            min(user_profile['loanAmount'] / 1000000, 1.0),  # loanAmountNorm
-            min(user_profile['annualIncome'] / 500000, 1.0),  # annualIncomeNorm
-            user_profile['creditScore'] / 850,  # creditScoreNorm
-            lender_data['interestRate'] / 20,  # interestRateNorm
+            min(user_profile['loanAmount'] * _INV_LOAN_AMOUNT, 1.0),  # loanAmountNorm
+            min(user_profile['annualIncome'] * _INV_ANNUAL_INCOME, 1.0),  # annualIncomeNorm
+            user_profile['creditScore'] * _INV_CREDIT_SCORE,  # creditScoreNorm
+            lender.interest_rate * _INV_INTEREST_RATE,  # interestRateNorm
             
             # Binary features
-            1.0 if (
-                'any' in lender_data.get('employmentTypes', []) or 
-                user_profile['employmentStatus'] in lender_data.get('employmentTypes', [])
+            1.0 if _employment_matches(
+                lender.empl_mask, lender.extra_employment_types, user_profile['employmentStatus']
             ) else 0.0,  # employmentMatch
             
             1.0 if (
-                lender_data.get('loanPurpose') == 'any' or 
-                lender_data.get('loanPurpose') == user_profile['loanPurpose']
+                lender.is_any_purpose or
+                lender.purpose == user_profile['loanPurpose']
             ) else 0.0,  # purposeMatch
             
-            1.0 if lender_data.get('specialEligibility') else 0.0,  # specialEligibility
+            lender.special_flag,  # specialEligibility
             
             # Ratio features
-            user_profile['loanAmount'] / lender_data['maxLoanAmount'],  # loanToMaxRatio
+            user_profile['loanAmount'] / lender.max_loan,  # loanToMaxRatio
             (
-                user_profile['annualIncome'] / lender_data['minIncome'] 
-                if lender_data['minIncome'] > 0 else 1.0
+                user_profile['annualIncome'] / lender.min_income
+                if lender.min_income > 0 else 1.0
             ),  # incomeMultiple
-            max(0, (user_profile['creditScore'] - lender_data['minCreditScore']) / 550),  # creditBuffer
+            max(0, (user_profile['creditScore'] - lender.min_credit_score) * _INV_CREDIT_BUFFER),  # creditBuffer
         ]
     
+    def _numpy_forward(self, features: np.ndarray) -> np.ndarray:
+        """NumPy mirror of LoanMatchingModel.forward (matmul/ReLU stack) plus the output sigmoid"""
+        hidden = (features - self._numpy_mean) / self._numpy_scale
+        last = len(self._numpy_layers) - 1
+        for i, (weight, bias) in enumerate(self._numpy_layers):
+            hidden = hidden @ weight + bias
+            if i < last:
+                hidden = np.maximum(hidden, 0.0)
+        
+        # tanh form of the sigmoid avoids exp overflow warnings on large logits
+        return 0.5 * (1.0 + np.tanh(0.5 * hidden))
+    
+    def _allocate_transfer_buffers(self):
+        """Allocate the (MAX_LENDERS, input_size) host buffer and its device twin"""
+        shape = (MAX_LENDERS, self.metadata['input_size'])
+        on_gpu = self.device.type == 'cuda'
+        self._host_buffer = torch.zeros(shape, dtype=torch.float32, pin_memory=on_gpu)
+        self._device_buffer = (
+            torch.zeros(shape, dtype=torch.float32, device=self.device) if on_gpu else self._host_buffer
+        )
+    
+    def _to_device(self, features: np.ndarray) -> torch.Tensor:
+        """Stage up to MAX_LENDERS feature rows into the padded device buffer"""
+        # Previous results were copied back with .cpu(), so the buffers are free to reuse.
+        # Rows past len(features) hold stale values; their outputs are discarded.
+        rows = len(features)
+        self._host_buffer[:rows].copy_(torch.from_numpy(features))
+        if self._device_buffer is not self._host_buffer:
+            self._device_buffer.copy_(self._host_buffer, non_blocking=True)
+        return self._device_buffer
+    
+    def _predict_probabilities(self, features: np.ndarray) -> np.ndarray:
+        """Run the model over an (n, input_size) feature matrix"""
+        if self._numpy_layers is not None:
+            return self._numpy_forward(features).reshape(-1)
+        
+        probabilities = np.empty(len(features), dtype=np.float32)
+        
+        # The traced graph takes exactly MAX_LENDERS rows: pad each chunk, keep the real rows
+        with torch.inference_mode():
+            for start in range(0, len(features), MAX_LENDERS):
+                chunk = features[start:start + MAX_LENDERS]
+                outputs = torch.sigmoid(self.model(self._to_device(chunk)))
+                probabilities[start:start + len(chunk)] = outputs[:len(chunk)].cpu().numpy()
+        
+        return probabilities
+    
     def predict_single(self, user_profile: Dict[str, Any], lender_data: Dict[str, Any]) -> Tuple[float, bool]:
         """Predict match probability for a single user-lender pair"""
         # Extract features
         features = self.extract_features(user_profile, lender_data)
         
-        # Normalize features
-        features_array = np.array([features])
-        features_scaled = self.scaler.transform(features_array)
-        
-        # Convert to tensor
-        features_tensor = torch.FloatTensor(features_scaled).to(self.device)
-        
-        # Predict
-        with torch.no_grad():
-            probability = self.model(features_tensor).item()
+        probability = float(self._predict_probabilities(np.array([features], dtype=np.float32))[0])
         
         # Convert to binary prediction (threshold = 0.5)
         is_good_match = probability > 0.5
@@ -103,16 +424,24 @@ class LoanMatchingInference:
     
     def predict_batch(self, user_profile: Dict[str, Any], lenders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Predict match probabilities for a user against multiple lenders"""
+        if not lenders:
+            return []
+        
+        # One (num_lenders, input_size) matrix and a single forward pass for all lenders
+        features = np.array(
+            [self.extract_features(user_profile, lender) for lender in lenders],
+            dtype=np.float32
+        )
+        probabilities = self._predict_probabilities(features).tolist()
+        
         results = []
         
-        for lender in lenders:
-            probability, is_good_match = self.predict_single(user_profile, lender)
-            
+        for lender, probability in zip(lenders, probabilities):
             results.append({
                 'lender_id': lender['id'],
                 'lender_name': lender['name'],
                 'match_probability': probability,
-                'is_good_match': is_good_match,
+                'is_good_match': probability > 0.5,
                 'match_score': probability * 100,  # Convert to 0-100 score
                 'interest_rate': lender['interestRate']
             })
@@ -126,21 +455,21 @@ class LoanMatchingInference:
                     top_k: int = 5) -> List[Dict[str, Any]]:
         """Rank lenders for a user and return top K matches"""
         predictions = self.predict_batch(user_profile, lenders)
+        lenders_by_id = {lender['id']: lender for lender in lenders}
         
         # Add ranking and additional info
         ranked_results = []
         for i, result in enumerate(predictions[:top_k]):
             result['rank'] = i + 1
-            result['explanation'] = self._generate_explanation(result, user_profile, lenders)
+            result['explanation'] = self._generate_explanation(
+                user_profile, lenders_by_id[result['lender_id']]
+            )
             ranked_results.append(result)
         
         return ranked_results
     
-    def _generate_explanation(self, result: Dict[str, Any], user_profile: Dict[str, Any], 
-                            lenders: List[Dict[str, Any]]) -> str:
+    def _generate_explanation(self, user_profile: Dict[str, Any], lender: Dict[str, Any]) -> str:
         """Generate human-readable explanation for the match"""
-        lender = next(l for l in lenders if l['id'] == result['lender_id'])
-        
         explanations = []
         
         # Interest rate competitiveness
@@ -173,54 +502,88 @@ class LoanMatchingInference:
     
     def check_eligibility(self, user_profile: Dict[str, Any], lender_data: Dict[str, Any]) -> Dict[str, bool]:
         """Check basic eligibility criteria"""
+        lender = self._normalize_lender(lender_data)
+        
         return {
-            'loanAmountInRange': lender_data['minLoanAmount'] <= user_profile['loanAmount'] <= lender_data['maxLoanAmount'],
-            'incomeRequirement': user_profile['annualIncome'] >= lender_data['minIncome'],
-            'creditScoreRequirement': user_profile['creditScore'] >= lender_data['minCreditScore'],
-            'employmentTypeMatch': (
-                'any' in lender_data.get('employmentTypes', []) or 
-                user_profile['employmentStatus'] in lender_data.get('employmentTypes', [])
+            'loanAmountInRange': lender.min_loan <= user_profile['loanAmount'] <= lender.max_loan,
+            'incomeRequirement': user_profile['annualIncome'] >= lender.min_income,
+            'creditScoreRequirement': user_profile['creditScore'] >= lender.min_credit_score,
+            'employmentTypeMatch': _employment_matches(
+                lender.empl_mask, lender.extra_employment_types, user_profile['employmentStatus']
             ),
             'purposeMatch': (
-                lender_data.get('loanPurpose') == 'any' or 
-                lender_data.get('loanPurpose') == user_profile['loanPurpose']
+                lender.is_any_purpose or
+                lender.purpose == user_profile['loanPurpose']
             )
         }
     
-    def predict_with_eligibility(self, user_profile: Dict[str, Any], lenders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Predict matches with eligibility filtering"""
+    def predict_with_eligibility(self, user_profile: Dict[str, Any],
+                                 lenders: Union[List[Dict[str, Any]], LenderTable]) -> List[Dict[str, Any]]:
+        """Predict matches with eligibility filtering; accepts lender dicts or a prebuilt LenderTable"""
+        return self.predict_many_with_eligibility([user_profile], lenders)[0]
+    
+    def predict_many_with_eligibility(self, user_profiles: List[Dict[str, Any]],
+                                      lenders: Union[List[Dict[str, Any]], LenderTable]) -> List[List[Dict[str, Any]]]:
+        """predict_with_eligibility for several users, scoring all eligible pairs in one forward pass"""
+        # Lender dicts are converted per call so edited terms are always picked up;
+        # callers reusing a lender list pass a prebuilt table instead
+        table = lenders if isinstance(lenders, LenderTable) else self.build_lender_table(lenders)
+        
+        # Check eligibility for all lenders at once, per user, and stack the eligible rows
+        checks = []
+        feature_blocks = []
+        for user_profile in user_profiles:
+            eligibility_columns = self._check_eligibility_vectorized(user_profile, table)
+            eligible_mask = np.logical_and.reduce(list(eligibility_columns.values()))
+            eligible_idx = np.flatnonzero(eligible_mask)
+            checks.append((eligibility_columns, eligible_mask, eligible_idx))
+            if len(eligible_idx):
+                feature_blocks.append(
+                    self._build_feature_matrix(user_profile, table, eligible_idx, eligibility_columns)
+                )
+        
+        # Only predict for eligible pairs, in a single forward pass across all users
+        if feature_blocks:
+            pair_probabilities = self._predict_probabilities(np.concatenate(feature_blocks))
+        else:
+            pair_probabilities = np.empty(0)
+        
+        all_results = []
+        offset = 0
+        for eligibility_columns, eligible_mask, eligible_idx in checks:
+            probabilities = np.zeros(len(table))
+            probabilities[eligible_idx] = pair_probabilities[offset:offset + len(eligible_idx)]
+            offset += len(eligible_idx)
+            all_results.append(
+                self._format_eligibility_results(table, eligibility_columns, eligible_mask, probabilities)
+            )
+        
+        return all_results
+    
+    def _format_eligibility_results(self, table: LenderTable, eligibility_columns: Dict[str, np.ndarray],
+                                    eligible_mask: np.ndarray, probabilities: np.ndarray) -> List[Dict[str, Any]]:
+        """Result dicts for one user, eligible lenders first by probability"""
+        eligibility_rows = [
+            dict(zip(eligibility_columns, row))
+            for row in zip(*(column.tolist() for column in eligibility_columns.values()))
+        ]
+        
         results = []
         
-        for lender in lenders:
-            # Check eligibility first
-            eligibility = self.check_eligibility(user_profile, lender)
-            
-            if all(eligibility.values()):
-                # Only predict for eligible lenders
-                probability, is_good_match = self.predict_single(user_profile, lender)
-                
-                results.append({
-                    'lender_id': lender['id'],
-                    'lender_name': lender['name'],
-                    'match_probability': probability,
-                    'is_good_match': is_good_match,
-                    'match_score': probability * 100,
-                    'interest_rate': lender['interestRate'],
-                    'is_eligible': True,
-                    'eligibility_details': eligibility
-                })
-            else:
-                # Not eligible
-                results.append({
-                    'lender_id': lender['id'],
-                    'lender_name': lender['name'],
-                    'match_probability': 0.0,
-                    'is_good_match': False,
-                    'match_score': 0.0,
-                    'interest_rate': lender['interestRate'],
-                    'is_eligible': False,
-                    'eligibility_details': eligibility
-                })
+        for lender_id, lender_name, interest_rate, is_eligible, probability, eligibility in zip(
+            table.ids, table.names, table.interest_rate.tolist(),
+            eligible_mask.tolist(), probabilities.tolist(), eligibility_rows
+        ):
+            results.append({
+                'lender_id': lender_id,
+                'lender_name': lender_name,
+                'match_probability': probability,
+                'is_good_match': probability > 0.5,
+                'match_score': probability * 100,
+                'interest_rate': interest_rate,
+                'is_eligible': is_eligible,
+                'eligibility_details': eligibility
+            })
         
         # Sort eligible matches by probability, then ineligible ones
         eligible_results = [r for r in results if r['is_eligible']]
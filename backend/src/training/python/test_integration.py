@@ -5,9 +5,10 @@ Test script for ML model integration
 
 import sys
 import os
+import tempfile
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from model_inference import LoanMatchingInference
+from model_inference import LoanMatchingInference, LenderTable
 
 def test_ml_integration():
     """Test the ML model with realistic scenarios"""
@@ -95,29 +96,38 @@ def test_ml_integration():
         }
     ]
     
+    # Score every scenario in one batched forward pass, against the lender table as a
+    # server would load it: converted once to the binary cache, then memory-mapped
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, 'lenders.npy')
+            inference.build_lender_table(all_lenders).save(cache_path)
+            lender_table = LenderTable.load(cache_path)
+            
+            all_results = inference.predict_many_with_eligibility(
+                [scenario['user'] for scenario in test_scenarios], lender_table
+            )
+            del lender_table  # release the mapping before the directory is removed
+    except Exception as e:
+        print(f"❌ Prediction failed: {e}")
+        return
+    
     # Test each scenario
-    for scenario in test_scenarios:
+    for scenario, results in zip(test_scenarios, all_results):
         print(f"\n🎯 Testing: {scenario['name']}")
         print(f"   User: {scenario['user']['loanPurpose']} loan of ${scenario['user']['loanAmount']:,}")
         print(f"   Income: ${scenario['user']['annualIncome']:,}, Credit: {scenario['user']['creditScore']}")
         
-        try:
-            # Get predictions
-            results = inference.predict_with_eligibility(scenario['user'], all_lenders)
-            
-            # Show eligible matches
-            eligible_matches = [r for r in results if r['is_eligible']]
-            
-            if eligible_matches:
-                print(f"   ✅ Found {len(eligible_matches)} eligible lender(s):")
-                for match in eligible_matches[:3]:  # Top 3
-                    print(f"      • {match['lender_name']}: {match['match_score']:.1f}% match" + 
-                          f" (Rate: {match['interest_rate']:.1f}%)")
-            else:
-                print("   ❌ No eligible lenders found")
-                
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
+        # Show eligible matches
+        eligible_matches = [r for r in results if r['is_eligible']]
+        
+        if eligible_matches:
+            print(f"   ✅ Found {len(eligible_matches)} eligible lender(s):")
+            for match in eligible_matches[:3]:  # Top 3
+                print(f"      • {match['lender_name']}: {match['match_score']:.1f}% match" + 
+                      f" (Rate: {match['interest_rate']:.1f}%)")
+        else:
+            print("   ❌ No eligible lenders found")
     
     print("\n" + "=" * 50)
     print("🎉 ML Integration Test Complete!")
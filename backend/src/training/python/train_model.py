@@ -1,32 +1,55 @@
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
 from torch.utils.data import Dataset, DataLoader
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+from torchmetrics import MetricCollection
+from torchmetrics.classification import (
+    BinaryAccuracy, BinaryPrecision, BinaryRecall, BinaryF1Score, BinaryAUROC
+)
 import json
 import os
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# Model input columns, in the order the network expects them
+FEATURE_COLS = [
+    'loan_amount_norm', 'annual_income_norm', 'credit_score_norm', 'interest_rate_norm',
+    'employment_match', 'purpose_match', 'special_eligibility',
+    'loan_to_max_ratio', 'income_multiple', 'credit_buffer'
+]
+
+def configure_cpu_threads():
+    """Size torch's thread pools to physical cores for CPU-only runs"""
+    # Hyperthreads plus autograd's interop pool oversubscribe on GEMMs as small as this MLP's
+    num_threads = max(1, (os.cpu_count() or 1) // 2)
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(2)
+    except RuntimeError:
+        pass  # Can only be set once, before any inter-op parallel work has started
+    
+    # Inherited by DataLoader workers and any other child processes
+    os.environ.setdefault('OMP_NUM_THREADS', str(num_threads))
+    os.environ.setdefault('MKL_NUM_THREADS', str(num_threads))
+
 class LoanDataset(Dataset):
     """PyTorch dataset for loan matching data"""
     
-    def __init__(self, features: np.ndarray, labels: np.ndarray, scores: np.ndarray = None):
+    def __init__(self, features: np.ndarray, labels: np.ndarray):
         self.features = torch.FloatTensor(features)
-        self.labels = torch.LongTensor(labels)
-        self.scores = torch.FloatTensor(scores) if scores is not None else None
+        # Stored as float so batches need no cast before BCE / device transfer
+        self.labels = torch.as_tensor(labels, dtype=torch.float32)
     
     def __len__(self):
         return len(self.features)
     
     def __getitem__(self, idx):
-        if self.scores is not None:
-            return self.features[idx], self.labels[idx], self.scores[idx]
         return self.features[idx], self.labels[idx]
 
 class LoanMatchingModel(nn.Module):
@@ -35,28 +58,58 @@ class LoanMatchingModel(nn.Module):
     def __init__(self, input_size: int, hidden_size: int = 32, dropout: float = 0.2):
         super(LoanMatchingModel, self).__init__()
         
-        # Multi-layer perceptron with regularization
-        self.network = nn.Sequential(
-            nn.Linear(input_size, hidden_size),
-            nn.ReLU(),
-            nn.Dropout(dropout),
-            nn.Linear(hidden_size, hidden_size // 2),
-            nn.ReLU(),
-            nn.Dropout(dropout),
-            nn.Linear(hidden_size // 2, 1),
-            nn.Sigmoid()
-        )
+        self.dropout = dropout
+        
+        # Multi-layer perceptron with regularization, as raw parameters so forward is three
+        # fused bias+matmul ops. Weights are stored (in, out): no transpose per call.
+        self.W1 = nn.Parameter(torch.empty(input_size, hidden_size))
+        self.b1 = nn.Parameter(torch.empty(hidden_size))
+        self.W2 = nn.Parameter(torch.empty(hidden_size, hidden_size // 2))
+        self.b2 = nn.Parameter(torch.empty(hidden_size // 2))
+        self.W3 = nn.Parameter(torch.empty(hidden_size // 2, 1))
+        self.b3 = nn.Parameter(torch.empty(1))
+        
+        # Feature standardization runs as the first op of forward; set from the training scaler
+        self.register_buffer('feat_mean', torch.zeros(input_size))
+        self.register_buffer('feat_std', torch.ones(input_size))
         
         # Initialize weights
-        self.apply(self._init_weights)
+        self._init_weights()
+        
+        # Checkpoints from the nn.Sequential layout still load
+        self.register_load_state_dict_pre_hook(self._remap_sequential_keys)
+    
+    def _init_weights(self):
+        # Xavier is symmetric in fan-in/fan-out, so the (in, out) layout gets the same range
+        for weight, bias in self.layers():
+            torch.nn.init.xavier_uniform_(weight)
+            torch.nn.init.zeros_(bias)
     
-    def _init_weights(self, module):
-        if isinstance(module, nn.Linear):
-            torch.nn.init.xavier_uniform_(module.weight)
-            module.bias.data.zero_()
+    def layers(self) -> List[Tuple[nn.Parameter, nn.Parameter]]:
+        """(weight, bias) per layer, weights shaped (in_features, out_features)"""
+        return [(self.W1, self.b1), (self.W2, self.b2), (self.W3, self.b3)]
+    
+    @staticmethod
+    def _remap_sequential_keys(module, state_dict, prefix, *args):
+        """Rename network.{0,3,6}.weight/bias to W/b, transposing nn.Linear's (out, in) weights"""
+        for layer, index in enumerate((0, 3, 6), start=1):
+            weight_key = f'{prefix}network.{index}.weight'
+            if weight_key in state_dict:
+                state_dict[f'{prefix}W{layer}'] = state_dict.pop(weight_key).t()
+                state_dict[f'{prefix}b{layer}'] = state_dict.pop(f'{prefix}network.{index}.bias')
+    
+    def set_normalization(self, mean: np.ndarray, std: np.ndarray):
+        """Load per-feature mean/std (e.g. StandardScaler.mean_/scale_) into the model"""
+        self.feat_mean.copy_(torch.as_tensor(mean, dtype=torch.float32))
+        self.feat_std.copy_(torch.as_tensor(std, dtype=torch.float32))
     
     def forward(self, x):
-        return self.network(x).squeeze()
+        x = (x - self.feat_mean) / self.feat_std
+        # Returns logits; apply torch.sigmoid for match probabilities
+        # addmm is bias + matmul in one op, the same kernel nn.Linear uses
+        h = F.dropout(F.relu(torch.addmm(self.b1, x, self.W1)), self.dropout, self.training)
+        h = F.dropout(F.relu(torch.addmm(self.b2, h, self.W2)), self.dropout, self.training)
+        return torch.addmm(self.b3, h, self.W3).squeeze(-1)
 
 class LoanMatchingTrainer:
     """Training pipeline for loan matching model"""
@@ -74,97 +127,156 @@ class LoanMatchingTrainer:
         
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         print(f"Using device: {self.device}")
+        if self.device.type == 'cpu':
+            configure_cpu_threads()
         
         self.model = None
         self.scaler = StandardScaler()
+        # Train/validation splits, kept on self.device by prepare_data
+        self.X_train = self.y_train = None
+        self.X_val = self.y_val = None
         self.training_history = {'train_loss': [], 'val_loss': [], 'val_accuracy': []}
     
     def load_data(self, filepath: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """Load training data from CSV"""
+        """Load training data from CSV or Parquet"""
         print(f"Loading data from {filepath}")
-        df = pd.read_csv(filepath)
         
-        # Feature columns
-        feature_cols = [
-            'loan_amount_norm', 'annual_income_norm', 'credit_score_norm', 'interest_rate_norm',
-            'employment_match', 'purpose_match', 'special_eligibility',
-            'loan_to_max_ratio', 'income_multiple', 'credit_buffer'
-        ]
-        
-        X = df[feature_cols].values
-        y = df['is_good_match'].values
-        scores = df['match_score'].values / 100  # Normalize to 0-1
+        # Parsed arrays are cached next to the CSV; reuse them until the CSV changes
+        cache = filepath + '.npz'
+        if (not filepath.endswith('.parquet') and os.path.exists(cache)
+                and os.path.getmtime(cache) >= os.path.getmtime(filepath)):
+            with np.load(cache) as cached:
+                X, y, scores = cached['X'], cached['y'], cached['scores']
+            print(f"Loaded {len(X)} samples with {X.shape[1]} features (cached)")
+            print(f"Positive class distribution: {y.mean():.2%}")
+            return X, y, scores
+        
+        # float32/int8 match what the model consumes and halve the memory of the defaults
+        dtypes = {col: np.float32 for col in FEATURE_COLS}
+        dtypes.update({'is_good_match': np.int8, 'match_score': np.float32})
+        
+        if filepath.endswith('.parquet'):
+            df = pd.read_parquet(filepath, columns=list(dtypes))
+        else:
+            # Only parse the columns we train on, straight into their final dtypes;
+            # skips the stringified 'features' list column and float64 intermediates
+            df = pd.read_csv(filepath, usecols=list(dtypes), dtype=dtypes)
+        
+        # No-op conversions for CSV input, which is already parsed as float32/int8
+        X = df[FEATURE_COLS].to_numpy(dtype=np.float32, copy=False)
+        y = df['is_good_match'].to_numpy(dtype=np.int8, copy=False)
+        scores = df['match_score'].to_numpy(dtype=np.float32) / 100  # Normalize to 0-1
+        
+        if not filepath.endswith('.parquet'):
+            try:
+                np.savez(cache, X=X, y=y, scores=scores)
+            except OSError as e:
+                # The cache is only an optimization; a read-only or full data directory
+                # must not fail training. Drop any partial file so it is not loaded later.
+                print(f"Skipping data cache {cache}: {e}")
+                try:
+                    os.remove(cache)
+                except OSError:
+                    pass
         
         print(f"Loaded {len(X)} samples with {X.shape[1]} features")
         print(f"Positive class distribution: {y.mean():.2%}")
         
         return X, y, scores
     
-    def prepare_data(self, X: np.ndarray, y: np.ndarray, scores: np.ndarray) -> Tuple[DataLoader, DataLoader, DataLoader]:
-        """Split and prepare data for training"""
+    def _loader_options(self) -> Dict[str, Any]:
+        """DataLoader options for the current device"""
+        if self.device.type != 'cuda':
+            # Batches are slices of in-memory tensors; workers and pinning only add overhead on CPU
+            return {}
+        
+        # Only the test loader uses these, for a single pass in evaluate_model. Pinned batches
+        # let .to(device, non_blocking=True) overlap the copy with GPU compute; the workers
+        # exit when that pass ends.
+        return {
+            'pin_memory': True,
+            'num_workers': min(2, os.cpu_count() or 1),
+        }
+    
+    def prepare_data(self, X: np.ndarray, y: np.ndarray) -> DataLoader:
+        """Split and prepare data for training; returns the test set loader"""
         # Split data
-        X_temp, X_test, y_temp, y_test, scores_temp, scores_test = train_test_split(
-            X, y, scores, test_size=0.15, random_state=42, stratify=y
+        X_temp, X_test, y_temp, y_test = train_test_split(
+            X, y, test_size=0.15, random_state=42, stratify=y
         )
         
-        X_train, X_val, y_train, y_val, scores_train, scores_val = train_test_split(
-            X_temp, y_temp, scores_temp, test_size=0.18, random_state=42, stratify=y_temp  # 0.15 of total
+        X_train, X_val, y_train, y_val = train_test_split(
+            X_temp, y_temp, test_size=0.18, random_state=42, stratify=y_temp  # 0.15 of total
         )
         
-        # Fit scaler on training data only
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_val_scaled = self.scaler.transform(X_val)
-        X_test_scaled = self.scaler.transform(X_test)
+        # Fit scaler on training data only; the model applies it in forward, so the
+        # splits themselves stay raw
+        self.scaler.fit(X_train)
         
-        # Create datasets
-        train_dataset = LoanDataset(X_train_scaled, y_train, scores_train)
-        val_dataset = LoanDataset(X_val_scaled, y_val, scores_val)
-        test_dataset = LoanDataset(X_test_scaled, y_test, scores_test)
+        # Upload train/validation splits to the device once; training batches are index
+        # slices of these tensors, so there is no per-batch collate or host->device copy
+        self.X_train = torch.from_numpy(X_train).float().to(self.device)
+        self.y_train = torch.from_numpy(y_train).float().to(self.device)
+        self.X_val = torch.from_numpy(X_val).float().to(self.device)
+        self.y_val = torch.from_numpy(y_val).float().to(self.device)
         
-        # Create data loaders
-        train_loader = DataLoader(
-            train_dataset, 
-            batch_size=self.model_config['batch_size'], 
-            shuffle=True
-        )
-        val_loader = DataLoader(
-            val_dataset, 
-            batch_size=self.model_config['batch_size'], 
-            shuffle=False
-        )
+        # Test set keeps the Dataset/DataLoader path used by evaluate_model
+        test_dataset = LoanDataset(X_test, y_test)
         test_loader = DataLoader(
             test_dataset, 
             batch_size=self.model_config['batch_size'], 
-            shuffle=False
+            shuffle=False,
+            **self._loader_options()
         )
         
-        print(f"Train set: {len(train_dataset)} samples")
-        print(f"Validation set: {len(val_dataset)} samples")
+        print(f"Train set: {len(self.X_train)} samples")
+        print(f"Validation set: {len(self.X_val)} samples")
         print(f"Test set: {len(test_dataset)} samples")
         
-        return train_loader, val_loader, test_loader
+        return test_loader
     
-    def train_model(self, train_loader: DataLoader, val_loader: DataLoader):
-        """Train the model with early stopping"""
-        input_size = len(train_loader.dataset[0][0])
+    def train_model(self):
+        """Train the model with early stopping on the splits loaded by prepare_data"""
+        input_size = self.X_train.shape[1]
+        num_train = len(self.X_train)
+        batch_size = self.model_config['batch_size']
+        num_batches = (num_train + batch_size - 1) // batch_size
         
         # Initialize model
         self.model = LoanMatchingModel(
             input_size=input_size,
             hidden_size=self.model_config['hidden_size'],
             dropout=self.model_config['dropout']
-        ).to(self.device)
+        )
+        self.model.set_normalization(self.scaler.mean_, self.scaler.scale_)
+        self.model.to(self.device)
+        
+        # Compiled view for the training/validation forwards. It shares parameters with
+        # self.model, which stays a plain module for state_dict() and TorchScript export.
+        # CUDA graphs ('reduce-overhead') cut launch overhead on GPU; CPU uses Inductor defaults.
+        compile_mode = 'reduce-overhead' if self.device.type == 'cuda' else 'default'
+        compiled_model = torch.compile(self.model, mode=compile_mode)
         
         # Loss and optimizer
-        criterion = nn.BCELoss()
+        # Fused sigmoid + BCE on logits: fewer ops and numerically stable
+        criterion = nn.BCEWithLogitsLoss()
         optimizer = optim.Adam(
             self.model.parameters(),
             lr=self.model_config['learning_rate'],
             weight_decay=self.model_config['weight_decay']
         )
         
+        # Mixed precision on CUDA: bf16 on Ampere and newer (no loss scaling needed),
+        # otherwise fp16 with a GradScaler. Older GPUs only emulate bf16, which is slower
+        # than fp32, so native support is checked via compute capability. CPU runs stay in fp32.
+        use_amp = self.device.type == 'cuda'
+        native_bf16 = use_amp and torch.cuda.get_device_capability(self.device)[0] >= 8
+        amp_dtype = torch.bfloat16 if native_bf16 else torch.float16
+        grad_scaler = torch.amp.GradScaler('cuda', enabled=use_amp and amp_dtype == torch.float16)
+        
         # Training loop with early stopping
         best_val_loss = float('inf')
+        best_state = None
         patience_counter = 0
         
         print("Starting training...")
@@ -174,40 +286,33 @@ class LoanMatchingTrainer:
             self.model.train()
             train_loss = 0.0
             
-            for batch_features, batch_labels, _ in train_loader:
-                batch_features = batch_features.to(self.device)
-                batch_labels = batch_labels.float().to(self.device)
+            permutation = torch.randperm(num_train, device=self.device)
+            for start in range(0, num_train, batch_size):
+                batch_idx = permutation[start:start + batch_size]
                 
                 optimizer.zero_grad()
-                outputs = self.model(batch_features)
-                loss = criterion(outputs, batch_labels)
-                loss.backward()
-                optimizer.step()
+                with torch.autocast(device_type=self.device.type, dtype=amp_dtype, enabled=use_amp):
+                    outputs = compiled_model(self.X_train[batch_idx])
+                    loss = criterion(outputs, self.y_train[batch_idx])
+                grad_scaler.scale(loss).backward()
+                grad_scaler.step(optimizer)
+                grad_scaler.update()
                 
                 train_loss += loss.item()
             
-            # Validation phase
+            # Validation phase: a single forward pass over the resident validation set
             self.model.eval()
-            val_loss = 0.0
-            val_predictions = []
-            val_targets = []
             
             with torch.no_grad():
-                for batch_features, batch_labels, _ in val_loader:
-                    batch_features = batch_features.to(self.device)
-                    batch_labels = batch_labels.float().to(self.device)
-                    
-                    outputs = self.model(batch_features)
-                    loss = criterion(outputs, batch_labels)
-                    val_loss += loss.item()
-                    
-                    val_predictions.extend(outputs.cpu().numpy())
-                    val_targets.extend(batch_labels.cpu().numpy())
+                outputs = compiled_model(self.X_val)
+                val_loss = criterion(outputs, self.y_val).item()
+                
+                # Threshold and compare on the device; only the scalar accuracy is copied back
+                val_predictions = torch.sigmoid(outputs) > 0.5
+                val_accuracy = (val_predictions == self.y_val.bool()).float().mean().item()
             
             # Calculate metrics
-            train_loss /= len(train_loader)
-            val_loss /= len(val_loader)
-            val_accuracy = accuracy_score(val_targets, [1 if p > 0.5 else 0 for p in val_predictions])
+            train_loss /= num_batches
             
             # Store history
             self.training_history['train_loss'].append(train_loss)
@@ -222,8 +327,8 @@ class LoanMatchingTrainer:
             if val_loss < best_val_loss:
                 best_val_loss = val_loss
                 patience_counter = 0
-                # Save best model
-                torch.save(self.model.state_dict(), '../models/best_model.pth')
+                # Keep the best weights in memory; written to disk once after training
+                best_state = {k: v.detach().clone() for k, v in self.model.state_dict().items()}
             else:
                 patience_counter += 1
                 if patience_counter >= self.model_config['early_stopping_patience']:
@@ -231,35 +336,36 @@ class LoanMatchingTrainer:
                     break
         
         # Load best model
-        self.model.load_state_dict(torch.load('../models/best_model.pth'))
+        if best_state is not None:
+            self.model.load_state_dict(best_state)
+            os.makedirs("../models", exist_ok=True)
+            torch.save(best_state, '../models/best_model.pth')
         print("Training completed!")
     
     def evaluate_model(self, test_loader: DataLoader) -> Dict[str, float]:
         """Evaluate model on test set"""
         self.model.eval()
-        test_predictions = []
-        test_targets = []
-        test_probabilities = []
+        
+        # Metrics accumulate on the device; nothing is copied back until compute()
+        test_metrics = MetricCollection({
+            'accuracy': BinaryAccuracy(),
+            'precision': BinaryPrecision(),
+            'recall': BinaryRecall(),
+            'f1': BinaryF1Score(),
+            'auc': BinaryAUROC()
+        }).to(self.device)
         
         with torch.no_grad():
-            for batch_features, batch_labels, _ in test_loader:
-                batch_features = batch_features.to(self.device)
-                batch_labels = batch_labels.float().to(self.device)
+            for batch_features, batch_labels in test_loader:
+                batch_features = batch_features.to(self.device, non_blocking=True)
+                batch_labels = batch_labels.to(self.device, non_blocking=True)
                 
-                outputs = self.model(batch_features)
-                
-                test_probabilities.extend(outputs.cpu().numpy())
-                test_predictions.extend([1 if p > 0.5 else 0 for p in outputs.cpu().numpy()])
-                test_targets.extend(batch_labels.cpu().numpy())
+                outputs = torch.sigmoid(self.model(batch_features)).reshape(-1)
+                test_metrics.update(outputs, batch_labels.long())
         
         # Calculate metrics
-        metrics = {
-            'accuracy': accuracy_score(test_targets, test_predictions),
-            'precision': precision_score(test_targets, test_predictions),
-            'recall': recall_score(test_targets, test_predictions),
-            'f1': f1_score(test_targets, test_predictions),
-            'auc': roc_auc_score(test_targets, test_probabilities)
-        }
+        results = test_metrics.compute()
+        metrics = {name: results[name].item() for name in ['accuracy', 'precision', 'recall', 'f1', 'auc']}
         
         print("\nTest Set Evaluation:")
         for metric, value in metrics.items():
@@ -267,6 +373,18 @@ class LoanMatchingTrainer:
         
         return metrics
     
+    def save_scripted_model(self, path: str):
+        """Save a frozen, eval-mode TorchScript export of the model"""
+        # Freezing inlines the eval-mode training flag, so dropout is folded out of the graph.
+        # optimize_for_inference is left to the loading side: it bakes in device-specific
+        # layouts, and the export should stay loadable on CPU or GPU.
+        self.model.eval()
+        scripted_model = torch.jit.freeze(torch.jit.script(self.model))
+        if 'aten::dropout' in str(scripted_model.graph):
+            raise RuntimeError("Dropout was not removed from the exported graph")
+        
+        scripted_model.save(path)
+    
     def save_model_artifacts(self):
         """Save model, scaler, and metadata"""
         os.makedirs("../models", exist_ok=True)
@@ -274,6 +392,9 @@ class LoanMatchingTrainer:
         # Save model
         torch.save(self.model.state_dict(), '../models/loan_matching_model.pth')
         
+        # Save a TorchScript export for serving without the Python model class
+        self.save_scripted_model('../models/loan_matching_model.ptc')
+        
         # Save scaler
         import joblib
         joblib.dump(self.scaler, '../models/feature_scaler.pkl')
@@ -282,11 +403,7 @@ class LoanMatchingTrainer:
         metadata = {
             'model_config': self.model_config,
             'input_size': len(self.scaler.mean_),
-            'feature_names': [
-                'loan_amount_norm', 'annual_income_norm', 'credit_score_norm', 'interest_rate_norm',
-                'employment_match', 'purpose_match', 'special_eligibility',
-                'loan_to_max_ratio', 'income_multiple', 'credit_buffer'
-            ],
+            'feature_names': FEATURE_COLS,
             'scaler_mean': self.scaler.mean_.tolist(),
             'scaler_std': self.scaler.scale_.tolist(),
             'training_history': self.training_history
@@ -326,19 +443,22 @@ def main():
     trainer = LoanMatchingTrainer()
     
     # Load data
-    data_path = "../data/loan_training_data.csv"
+    data_path = "../data/loan_training_data.parquet"
+    if not os.path.exists(data_path):
+        data_path = "../data/loan_training_data.csv"
     if not os.path.exists(data_path):
         print(f"Data file not found: {data_path}")
         print("Please run data_generation.py first to generate training data.")
         return
     
-    X, y, scores = trainer.load_data(data_path)
+    # Match scores are not used by the classifier
+    X, y, _ = trainer.load_data(data_path)
     
     # Prepare data
-    train_loader, val_loader, test_loader = trainer.prepare_data(X, y, scores)
+    test_loader = trainer.prepare_data(X, y)
     
     # Train model
-    trainer.train_model(train_loader, val_loader)
+    trainer.train_model()
     
     # Evaluate model
     metrics = trainer.evaluate_model(test_loader)